@@ -3,50 +3,282 @@ import os
 import sys
 import csv
 import asyncio
+import argparse
+import hashlib
+import logging
+import re
+import operator
+from functools import lru_cache
+from pathlib import Path
 from typing import List, Dict, Any, Literal
 from dataclasses import dataclass
+import httpx
+import msgspec
 from dotenv import load_dotenv
-from agents import Agent, Runner, trace
-from pydantic import BaseModel, create_model, ValidationError
+from agents import Agent, AgentOutputSchema, ModelBehaviorError, Runner, set_default_openai_client, trace
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import BaseModel, ConfigDict, create_model, ValidationError
 
 # Load environment variables
 load_dotenv()
 
+# Default folders for bare schema and CSV filenames
+SCHEMAS_DIR = Path('schemas')
+CSV_OUTPUT_DIR = Path('csv_output')
+
+logger = logging.getLogger(__name__)
+
+# Number of prompts marshalled into a single LLM request
+BATCH_SIZE = 8
+
+# Default number of in-flight LLM requests when generating from a prompts file
+DEFAULT_CONCURRENCY = 8
+
+# Write buffer size for CSV output, so large batches need few write syscalls
+CSV_BUFFER_SIZE = 1024 * 1024
+
+# Seconds an idle pooled HTTP connection is kept open for reuse
+HTTP_KEEPALIVE_EXPIRY = 60
+
+# Number of rows handed to the CSV writer at a time
+CSV_CHUNK_SIZE = 1024
+
+# Number of generated records printed before asking to save
+PREVIEW_SIZE = 5
+
+# Agents built so far, keyed by schema hash and agent options
+_AGENT_CACHE = {}
+
+# Output models reject unknown keys, giving additionalProperties: false in their JSON schema
+STRICT_CONFIG = ConfigDict(extra='forbid')
+
+# Map JSON schema types to Python types
+TYPE_MAP = {
+    'string': str,
+    'integer': int,
+    'number': float,
+    'boolean': bool,
+    'array': List,
+    'object': Dict
+}
+
+# Map JSON schema types to the type names used in the system message
+TYPE_LABELS = {
+    'string': 'string',
+    'integer': 'integer',
+    'number': 'number',
+    'boolean': 'boolean',
+    'array': 'list',
+    'object': 'dictionary'
+}
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """A schema property with its Python type and prompt details"""
+    name: str
+    json_type: str
+    py_type: Any
+    description: str
+    example: Any
+    has_example: bool
+    bounds: tuple  # min/max constraints, e.g. ("min: 0", "max: 5")
+    formats: tuple  # format/pattern constraints
+
+def iter_schema_fields(schema):
+    """Yield a FieldSpec for every property of the schema"""
+    for field_name, field_schema in schema.get('properties', {}).items():
+        json_type = field_schema.get('type', 'unknown')
+        
+        bounds = []
+        if 'minimum' in field_schema:
+            bounds.append(f"min: {field_schema['minimum']}")
+        if 'maximum' in field_schema:
+            bounds.append(f"max: {field_schema['maximum']}")
+        
+        formats = []
+        if 'format' in field_schema:
+            formats.append(f"format: {field_schema['format']}")
+        if 'pattern' in field_schema:
+            formats.append(f"pattern: {field_schema['pattern']}")
+        
+        yield FieldSpec(
+            name=field_name,
+            json_type=json_type,
+            py_type=TYPE_MAP.get(json_type, str),
+            description=field_schema.get('description', 'No description'),
+            example=field_schema.get('example'),
+            has_example='example' in field_schema,
+            bounds=tuple(bounds),
+            formats=tuple(formats)
+        )
+
+def json_dumps_indented(obj):
+    """Serialize an object to JSON indented by 2 spaces"""
+    return msgspec.json.format(msgspec.json.encode(obj), indent=2).decode()
+
+def _schema_key(schema):
+    """JSON form of a schema, usable as a hashable cache key"""
+    # Keys are not sorted: property order decides the record field (and CSV column) order
+    return msgspec.json.encode(schema)
+
+@lru_cache(maxsize=32)
+def _schema_fields(schema_key):
+    return tuple(iter_schema_fields(msgspec.json.decode(schema_key)))
+
 def get_generated_records_model(schema):
     """Dynamically create a GeneratedRecords model based on the schema"""
-    # Map JSON schema types to Python types
-    type_mapping = {
-        'string': str,
-        'integer': int,
-        'number': float,
-        'boolean': bool,
-        'array': List,
-        'object': Dict
+    # Building pydantic models is expensive, so each distinct schema is only built once
+    return _build_generated_records_model(_schema_key(schema))
+
+@lru_cache(maxsize=32)
+def _build_generated_records_model(schema_key):
+    RecordModel = _build_record_model(schema_key)
+    
+    # Create the GeneratedRecords model
+    generated_records_fields = {
+        'records': (List[RecordModel], ...),
+        'count': (int, ...)
     }
     
+    return create_model('GeneratedRecords', __config__=STRICT_CONFIG, **generated_records_fields)
+
+@lru_cache(maxsize=32)
+def _build_record_model(schema_key):
     # Create fields for the record model based on schema properties
     record_fields = {}
-    for field_name, field_schema in schema.get('properties', {}).items():
-        field_type = field_schema.get('type', 'string')
-        python_type = type_mapping.get(field_type, str)
-        record_fields[field_name] = (python_type, ...)  # ... means required
+    for field in _schema_fields(schema_key):
+        record_fields[field.name] = (field.py_type, ...)  # ... means required
     
     # Create the record model
-    RecordModel = create_model('RecordModel', **record_fields)
+    return create_model('RecordModel', __config__=STRICT_CONFIG, **record_fields)
+
+def get_batched_generated_records_model(schema):
+    """Create a BatchedGeneratedRecords model holding one GeneratedRecords per prompt"""
+    return _build_batched_generated_records_model(_schema_key(schema))
+
+@lru_cache(maxsize=32)
+def _build_batched_generated_records_model(schema_key):
+    GeneratedRecords = _build_generated_records_model(schema_key)
+    return create_model('BatchedGeneratedRecords', __config__=STRICT_CONFIG, batches=(List[GeneratedRecords], ...))
+
+def get_record_struct(schema):
+    """Get the msgspec RecordStruct describing a single record of the schema"""
+    return _build_record_struct(_schema_key(schema))
+
+@lru_cache(maxsize=32)
+def _build_record_struct(schema_key):
+    # Structs are slotted already; frozen records without GC tracking keep large batches
+    # small and cheap to allocate (records never form reference cycles)
+    return msgspec.defstruct(
+        'RecordStruct',
+        [(field.name, field.py_type) for field in _schema_fields(schema_key)],
+        frozen=True,
+        gc=False,
+        forbid_unknown_fields=True
+    )
+
+def get_generated_records_struct(schema):
+    """Dynamically create a msgspec GeneratedRecordsStruct based on the schema"""
+    return _build_generated_records_struct(_schema_key(schema))
+
+@lru_cache(maxsize=32)
+def _build_generated_records_struct(schema_key):
+    RecordStruct = _build_record_struct(schema_key)
+    return msgspec.defstruct(
+        'GeneratedRecordsStruct',
+        [('records', List[RecordStruct]), ('count', int)],
+        gc=False,
+        forbid_unknown_fields=True
+    )
+
+def get_batched_generated_records_struct(schema):
+    """Create a msgspec BatchedGeneratedRecordsStruct holding one GeneratedRecordsStruct per prompt"""
+    return _build_batched_generated_records_struct(_schema_key(schema))
+
+@lru_cache(maxsize=32)
+def _build_batched_generated_records_struct(schema_key):
+    GeneratedRecordsStruct = _build_generated_records_struct(schema_key)
+    return msgspec.defstruct(
+        'BatchedGeneratedRecordsStruct',
+        [('batches', List[GeneratedRecordsStruct])],
+        gc=False,
+        forbid_unknown_fields=True
+    )
+
+@lru_cache(maxsize=32)
+def get_decoder(struct_type):
+    """Get a reusable msgspec JSON decoder for a struct type"""
+    return msgspec.json.Decoder(struct_type)
+
+class MsgspecOutputSchema(AgentOutputSchema):
+    """Agent output schema that advertises the pydantic JSON schema but decodes with msgspec"""
     
-    # Create the GeneratedRecords model
-    generated_records_fields = {
-        'records': (List[RecordModel], ...),
-        'count': (int, ...)
-    }
+    def __init__(self, output_type, struct_type):
+        # A strict JSON schema makes the model use native structured output (a json_schema
+        # response format), so responses are always bare JSON matching the schema
+        super().__init__(output_type, strict_json_schema=True)
+        self._decoder = get_decoder(struct_type)
     
-    return create_model('GeneratedRecords', **generated_records_fields)
+    def validate_json(self, json_str):
+        # msgspec decodes and validates large LLM outputs several times faster than pydantic
+        try:
+            return self._decoder.decode(json_str)
+        except msgspec.DecodeError as e:
+            raise ModelBehaviorError(f"Invalid JSON when parsing {json_str} for {self.name()}; {e}") from e
+
+def get_output_schema(schema, batched=False):
+    """Create the agent output schema for the (batched) GeneratedRecords of a schema"""
+    if batched:
+        return MsgspecOutputSchema(get_batched_generated_records_model(schema), get_batched_generated_records_struct(schema))
+    return MsgspecOutputSchema(get_generated_records_model(schema), get_generated_records_struct(schema))
+
+def get_agent(schema, batched=False, verbose=False):
+    """Get the data generation agent for a schema, building it on first use"""
+    key = (hashlib.blake2b(_schema_key(schema)).hexdigest(), batched, verbose)
+    agent = _AGENT_CACHE.get(key)
+    if agent is None:
+        if batched:
+            GeneratedRecords = get_batched_generated_records_model(schema)
+        else:
+            GeneratedRecords = get_generated_records_model(schema)
+        
+        agent = Agent[GeneratedRecords](
+            name="Synthetic Data Generator",
+            instructions=create_system_message(schema, batched, verbose),
+            output_type=get_output_schema(schema, batched)
+        )
+        _AGENT_CACHE[key] = agent
+    return agent
+
+def clear_agent_cache():
+    """Forget all cached agents"""
+    _AGENT_CACHE.clear()
+
+def create_openai_client(max_connections=DEFAULT_CONCURRENCY):
+    """Create an OpenAI client whose connection pool is sized for the request concurrency"""
+    # DefaultAsyncHttpxClient keeps the OpenAI SDK defaults (redirects, timeouts);
+    # only the pool limits change
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+    return AsyncOpenAI(http_client=http_client)
+
+def resolve_path(path, default_dir):
+    """Resolve a path, placing bare filenames in default_dir"""
+    # Decide from the raw string: pathlib normalises away a leading "./"
+    if os.path.isabs(path) or os.path.dirname(path):
+        return Path(path)
+    return default_dir / path
 
 def load_schema(schema_file):
     """Load JSON schema from file"""
-    # If no path separator is provided, assume it's in the schemas folder
-    if '/' not in schema_file and '\\' not in schema_file:
-        schema_file = os.path.join('schemas', schema_file)
+    # If no directory is provided, assume it's in the schemas folder
+    schema_file = resolve_path(schema_file, SCHEMAS_DIR)
     
     try:
         with open(schema_file, 'r') as f:
@@ -59,68 +291,43 @@ def load_schema(schema_file):
         print(f"Error: Invalid JSON in schema file '{schema_file}'.")
         sys.exit(1)
 
-def create_system_message(schema):
+def create_system_message(schema, batched=False, verbose=False):
     """Create the system message for the agent"""
+    # The message only depends on the schema, so it is composed once per schema
+    return _build_system_message(_schema_key(schema), batched, verbose)
+
+@lru_cache(maxsize=32)
+def _build_system_message(schema_key, batched, verbose):
     # Extract examples, min/max values from schema
     schema_info = []
     field_descriptions = []
     
-    for field_name, field_schema in schema.get('properties', {}).items():
-        field_info = f"- {field_name} ({field_schema.get('type', 'unknown')}): {field_schema.get('description', 'No description')}"
+    for field in _schema_fields(schema_key):
+        field_info = f"- {field.name} ({field.json_type}): {field.description}"
         
         # Add example if available
-        if 'example' in field_schema:
-            field_info += f" | Example: {field_schema['example']}"
+        if field.has_example:
+            field_info += f" | Example: {field.example}"
         
         # Add min/max constraints if available
-        constraints = []
-        if 'minimum' in field_schema:
-            constraints.append(f"min: {field_schema['minimum']}")
-        if 'maximum' in field_schema:
-            constraints.append(f"max: {field_schema['maximum']}")
-        
-        if constraints:
-            field_info += f" | Constraints: {', '.join(constraints)}"
+        if field.bounds:
+            field_info += f" | Constraints: {', '.join(field.bounds)}"
         
         schema_info.append(field_info)
         
-        # Build dynamic field description for record model
-        field_type = field_schema.get('type', 'unknown')
-        field_desc = field_schema.get('description', 'No description')
-        
-        # Map JSON schema types to Python types
-        type_mapping = {
-            'string': 'string',
-            'integer': 'integer',
-            'number': 'number',
-            'boolean': 'boolean',
-            'array': 'list',
-            'object': 'dictionary'
-        }
+        # Build dynamic field description for record model, which also lists format/pattern
+        constraints = field.bounds + field.formats
+        constraint_text = f" ({', '.join(constraints)})" if constraints else ""
         
-        python_type = type_mapping.get(field_type, field_type)
-        
-        # Add constraints to description
-        constraint_info = []
-        if 'minimum' in field_schema:
-            constraint_info.append(f"min: {field_schema['minimum']}")
-        if 'maximum' in field_schema:
-            constraint_info.append(f"max: {field_schema['maximum']}")
-        if 'format' in field_schema:
-            constraint_info.append(f"format: {field_schema['format']}")
-        if 'pattern' in field_schema:
-            constraint_info.append(f"pattern: {field_schema['pattern']}")
-        
-        constraint_text = f" ({', '.join(constraint_info)})" if constraint_info else ""
-        
-        field_descriptions.append(f"  * {field_name}: {python_type} ({field_desc}){constraint_text}")
+        field_descriptions.append(f"  * {field.name}: {TYPE_LABELS.get(field.json_type, field.json_type)} ({field.description}){constraint_text}")
+    
+    # The raw schema duplicates the details below, so it is only included on request
+    # to keep the prompt (and per-call latency and token cost) small
+    schema_block = f"\nSchema:\n{json_dumps_indented(msgspec.json.decode(schema_key))}\n" if verbose else ""
     
     # Create system message with schema context
     system_message = f"""You are a test data generator. Generate records based on the provided schema and user requirements.
-
-Schema:
-{json.dumps(schema, indent=2)}
-
+{schema_block}
 Schema Details:
 {chr(10).join(schema_info)}
 
@@ -139,10 +346,74 @@ CRITICAL: You must return a GeneratedRecords object with:
 Each record should be a dictionary with field names as keys and values that match the schema types and constraints.
 
 Generate only valid records that strictly follow the schema. If the user doesn't specify the number of records, generate 5 records by default."""
+
+    if batched:
+        system_message += """
+
+You will receive multiple prompts numbered [1]..[N]; return a list of GeneratedRecords in the same order, as the batches field of a BatchedGeneratedRecords object."""
     
     return system_message
 
-async def generate_records(agent, prompt, schema):
+def records_to_dicts(records):
+    """Convert record objects to dictionaries for compatibility"""
+    # asdict is already a per-struct-type specialized converter implemented in C, and
+    # mapping it keeps the whole loop out of Python bytecode
+    return list(map(msgspec.structs.asdict, records))
+
+class RecordStreamParser:
+    """Incrementally extract complete records from streamed GeneratedRecords JSON"""
+    
+    # Characters that can change the JSON nesting or string state
+    _TOKEN = re.compile(r'["\\{}\[\]]')
+    
+    # Nesting depth of a record object: GeneratedRecords object > records array > record
+    _RECORD_DEPTH = 3
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = -1
+        self._start = None
+    
+    def feed(self, text):
+        """Add streamed text and return the JSON of every record it completes"""
+        buffer = self._buffer + text
+        complete = []
+        
+        for match in self._TOKEN.finditer(buffer, self._pos):
+            i = match.start()
+            c = buffer[i]
+            if self._in_string:
+                if i == self._escaped:
+                    continue
+                if c == '\\':
+                    self._escaped = i + 1
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._depth += 1
+                if self._depth == self._RECORD_DEPTH and c == '{':
+                    self._start = i
+            elif c in '}]':
+                if self._depth == self._RECORD_DEPTH and self._start is not None:
+                    complete.append(buffer[self._start:i + 1])
+                    self._start = None
+                self._depth -= 1
+        
+        # Only the text of a record still in progress needs to be kept
+        keep = self._start if self._start is not None else len(buffer)
+        self._buffer = buffer[keep:]
+        self._pos = len(self._buffer)
+        self._escaped -= keep
+        if self._start is not None:
+            self._start = 0
+        return complete
+
+async def generate_records(agent, prompt):
     """Generate test records using the agent"""
     
     # Use the agent to generate data
@@ -153,116 +424,298 @@ async def generate_records(agent, prompt, schema):
         )
     
     # The response is now a GeneratedRecords object
-    print(f"Response type: {type(response)}")
-    print(f"Response attributes: {dir(response) if hasattr(response, '__dict__') else 'No attributes'}")
+    logger.debug("response type=%s", type(response))
     
     # Handle RunResult objects
     if hasattr(response, 'final_output'):
         response = response.final_output
-        print(f"Final output type: {type(response)}")
+        logger.debug("final output type=%s", type(response))
     
     if hasattr(response, 'records') and response.records:
-        # Convert record objects to dictionaries for compatibility
-        records = []
-        for record in response.records:
-            # Dynamically create record_dict based on schema properties
-            record_dict = {}
-            for field_name in schema.get('properties', {}).keys():
-                if hasattr(record, field_name):
-                    record_dict[field_name] = getattr(record, field_name)
-            records.append(record_dict)
-        return records
+        return records_to_dicts(response.records)
     else:
-        # Fallback: try to parse as raw JSON if the structured format failed
-        print("Structured response failed, trying to parse as raw JSON...")
-        if isinstance(response, str):
-            content = response.strip()
-            # Try to extract JSON from the response
-            if content.startswith('```json'):
-                content = content[7:-3]  # Remove markdown code blocks
-            elif content.startswith('```'):
-                content = content[3:-3]
-            
-            content = content.strip()
-            records = json.loads(content)
-            return records
+        print("No records generated in response")
+        return None
+
+async def generate_records_batch(agent, prompts):
+    """Generate test records for several prompts in a single agent run"""
+    # The agent must use the BatchedGeneratedRecords output type; one list of
+    # records (or None) is returned per prompt, in prompt order
+    numbered_prompts = "\n".join(f"[{i}] {prompt}" for i, prompt in enumerate(prompts, 1))
+    
+    with trace("Batched Data Generation"):
+        response = await Runner.run(
+            agent,
+            f"Generate one batch of records for each of these prompts:\n{numbered_prompts}"
+        )
+    
+    batches = getattr(response.final_output, 'batches', None) or []
+    if len(batches) != len(prompts):
+        print(f"Warning: expected {len(prompts)} batches, got {len(batches)}")
+    
+    results = []
+    for i in range(len(prompts)):
+        if i < len(batches) and batches[i].records:
+            results.append(records_to_dicts(batches[i].records))
         else:
-            print("No records generated in response")
-            return None
+            results.append(None)
+    return results
 
-async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python test_data_generator.py <schema_file.json>")
-        print("Schema files should be placed in the 'schemas/' folder.")
-        print("Generated CSV files will be saved to the 'csv_output/' folder.")
-        print("Examples:")
-        print("  python test_data_generator.py product_schema.json")
-        print("  python test_data_generator.py sample_schema.json")
-        print("  python test_data_generator.py schemas/product_schema.json")
+async def generate_records_concurrently(agent, prompts, concurrency=DEFAULT_CONCURRENCY):
+    """Generate test records for many prompts, overlapping the LLM calls"""
+    # Bound the number of in-flight requests to stay within rate limits
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _one(prompt):
+        async with semaphore:
+            return await generate_records(agent, prompt)
+    
+    return await asyncio.gather(*[_one(prompt) for prompt in prompts], return_exceptions=True)
+
+def load_prompts(prompts_file):
+    """Load prompts from a text file, one prompt per line"""
+    try:
+        with open(prompts_file, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        print(f"Error: Prompts file '{prompts_file}' not found.")
         sys.exit(1)
+
+async def stream_records_to_csv(agent, prompt, schema, filename, fsync=False):
+    """Generate test records and append them to a CSV file as they stream in"""
+    # If no directory is provided, save to csv_output folder
+    filename = resolve_path(filename, CSV_OUTPUT_DIR)
+    RecordStruct = get_record_struct(schema)
+    decoder = get_decoder(RecordStruct)
+    parser = RecordStreamParser()
+    count = 0
     
-    schema_file = sys.argv[1]
+    with open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        writer.writerow(RecordStruct.__struct_fields__)
+        
+        with trace("Streaming Data Generation"):
+            result = Runner.run_streamed(
+                agent,
+                f"Generate records based on this prompt: {prompt}"
+            )
+            async for event in result.stream_events():
+                if event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+                    continue
+                
+                # Write each record as soon as its JSON object is complete
+                record_jsons = parser.feed(event.data.delta)
+                if record_jsons:
+                    writer.writerows(msgspec.structs.astuple(decoder.decode(record_json)) for record_json in record_jsons)
+                    f.flush()
+                    count += len(record_jsons)
+        
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
     
-    # Use the agent to run the workflow
-    schema = load_schema(schema_file)
+    print(f"Saved {count} records to {filename}")
+    return count
+
+def _row_getter(fieldnames):
+    """Build a function returning a record's values in fieldnames order"""
+    # itemgetter fetches the values in C, but returns a bare value for a single key
+    # and cannot be built without keys, so those cases get small wrappers
+    if len(fieldnames) > 1:
+        return operator.itemgetter(*fieldnames)
     
-    # Create the dynamic GeneratedRecords model based on the schema
-    GeneratedRecords = get_generated_records_model(schema)
+    if len(fieldnames) == 1:
+        fieldname = fieldnames[0]
+        
+        def to_row(record):
+            return (record[fieldname],)
+    else:
+        def to_row(record):
+            return ()
+    return to_row
+
+def save_records(records, filename, fsync=False):
+    """Save records to a CSV file"""
+    # If no directory is provided, save to csv_output folder
+    filename = resolve_path(filename, CSV_OUTPUT_DIR)
     
-    # Create system message for the agent
-    system_message = create_system_message(schema)
+    # Get fieldnames from the first record
+    if records and len(records) > 0:
+        fieldnames = list(records[0].keys())
+        
+        to_row = _row_getter(fieldnames)
+        
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as f:
+            # A plain writer fed value lists avoids DictWriter's per-row dict handling
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            for i in range(0, len(records), CSV_CHUNK_SIZE):
+                writer.writerows(list(map(to_row, records[i:i + CSV_CHUNK_SIZE])))
+                f.flush()
+            
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        print(f"Saved to {filename}")
+    else:
+        print("No records to save.")
+
+def review_records(records, fsync=False, full_preview=False):
+    """Print generated records and offer to save them to a CSV file"""
+    if not records:
+        print("Failed to generate records.")
+        return
+    
+    print("\nGenerated Records:")
+    if full_preview:
+        print(json_dumps_indented(records))
+    else:
+        # Only serialize the first few records; the CSV writer is the only full pass
+        print(json_dumps_indented(records[:PREVIEW_SIZE]))
+        if len(records) > PREVIEW_SIZE:
+            print(f"... (+{len(records) - PREVIEW_SIZE} more)")
     
-    # Create an agent for tracing
-    agent = Agent[GeneratedRecords](
-        name="Synthetic Data Generator", 
-        instructions=system_message,
-        output_type=GeneratedRecords
+    # Save to file
+    save = input("\nSave to file? (y/n): ")
+    if save.lower() == 'y':
+        filename = input("Filename (default: generated_data.csv): ")
+        filename = filename if filename else "generated_data.csv"
+        save_records(records, filename, fsync)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic test data from a JSON schema. "
+                    "Schema files should be placed in the 'schemas/' folder. "
+                    "Generated CSV files will be saved to the 'csv_output/' folder.",
+        epilog="Examples:\n"
+               "  python test_data_generator.py product_schema.json\n"
+               "  python test_data_generator.py sample_schema.json\n"
+               "  python test_data_generator.py schemas/product_schema.json\n"
+               "  python test_data_generator.py sample_schema.json --prompts-file prompts.txt --concurrency 16",
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
+    parser.add_argument('schema_file', help="JSON schema file")
+    parser.add_argument('--prompts-file', help="generate records for every prompt in this file (one per line) instead of running interactively")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"maximum number of concurrent LLM requests in --prompts-file mode (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--fsync', action='store_true', help="fsync saved CSV files to disk before closing them")
+    parser.add_argument('--verbose-schema', action='store_true', help="include the raw JSON schema in the system message")
+    parser.add_argument('--full-preview', action='store_true', help=f"print all generated records instead of the first {PREVIEW_SIZE}")
+    parser.add_argument('--stream', action='store_true', help="stream each prompt's records straight to a CSV file as they are generated")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.stream and args.prompts_file:
+        parser.error("--stream cannot be used with --prompts-file")
+    if args.full_preview and (args.stream or args.prompts_file):
+        parser.error("--full-preview only applies to the interactive mode without --stream")
+    return args
+
+async def run_prompts_file(schema, prompts_file, concurrency, fsync=False, verbose_schema=False):
+    """Generate records for every prompt in a file concurrently and save them to one CSV"""
+    prompts = load_prompts(prompts_file)
+    
+    agent = get_agent(schema, verbose=verbose_schema)
+    
+    print(f"Generating records for {len(prompts)} prompt(s) with concurrency {concurrency}...")
+    results = await generate_records_concurrently(agent, prompts, concurrency)
+    
+    all_records = []
+    for prompt, records in zip(prompts, results):
+        if isinstance(records, Exception):
+            print(f"Failed to generate records for '{prompt}': {records}")
+        elif not records:
+            print(f"No records generated for '{prompt}'")
+        else:
+            all_records.extend(records)
+    
+    save_records(all_records, Path(prompts_file).stem + ".csv", fsync)
+
+async def run_streaming(schema, fsync=False, verbose_schema=False):
+    """Interactively generate records, streaming each prompt's records to a CSV file"""
+    agent = get_agent(schema, verbose=verbose_schema)
     
+    while True:
+        prompt = input("Enter your data generation prompt (or 'quit' to exit): ")
+        if prompt.lower() == 'quit':
+            break
+        
+        filename = input("Filename (default: generated_data.csv): ")
+        filename = filename if filename else "generated_data.csv"
+        
+        print(f"\nGenerating records...")
+        await stream_records_to_csv(agent, prompt, schema, filename, fsync)
+        
+        print("\n" + "=" * 50)
+
+async def main():
+    args = parse_args()
+    
+    # Use the agent to run the workflow
+    schema = load_schema(args.schema_file)
+    
+    # Share one OpenAI client and HTTP connection pool across every agent run
+    client = create_openai_client(args.concurrency)
+    set_default_openai_client(client)
+    try:
+        await run(args, schema)
+    finally:
+        await client.close()
+
+async def run(args, schema):
+    schema_file = args.schema_file
+    
+    if args.prompts_file:
+        await run_prompts_file(schema, args.prompts_file, args.concurrency, args.fsync, args.verbose_schema)
+        return
     
     print("Test Data Generator")
     print("=" * 50)
     print(f"Loaded schema from: {schema_file}")
+    
+    if args.stream:
+        print()
+        await run_streaming(schema, args.fsync, args.verbose_schema)
+        return
+    
+    # Create an agent for tracing, with the dynamic BatchedGeneratedRecords model based on
+    # the schema (cached per schema, so the build cost is only paid on first load)
+    agent = get_agent(schema, batched=True, verbose=args.verbose_schema)
+    
+    print(f"Prompts are queued and sent together; type 'run' to generate (sent automatically every {BATCH_SIZE} prompts, and on 'quit').")
     print()
     
+    pending = []
     while True:
-        prompt = input("Enter your data generation prompt (or 'quit' to exit): ")
-        if prompt.lower() == 'quit':
+        prompt = input("Enter your data generation prompt ('run' to generate, 'quit' to exit): ")
+        quitting = prompt.lower() == 'quit'
+        if quitting and not pending:
             break
-            
-        print(f"\nGenerating records...")
-        records = await generate_records(agent, prompt, schema)
         
-        if records:
-            print("\nGenerated Records:")
-            print(json.dumps(records, indent=2))
+        # Queued prompts are still generated on 'quit' so no input is lost
+        if not quitting and prompt.lower() != 'run':
+            pending.append(prompt)
+            if len(pending) < BATCH_SIZE:
+                print(f"Queued ({len(pending)}/{BATCH_SIZE})")
+                continue
+        
+        if not pending:
+            print("No prompts queued.")
+            continue
             
-            # Save to file
-            save = input("\nSave to file? (y/n): ")
-            if save.lower() == 'y':
-                filename = input("Filename (default: generated_data.csv): ")
-                filename = filename if filename else "generated_data.csv"
-                
-                # If no path separator is provided, save to csv_output folder
-                if '/' not in filename and '\\' not in filename:
-                    filename = os.path.join('csv_output', filename)
-                
-                # Get fieldnames from the first record
-                if records and len(records) > 0:
-                    fieldnames = list(records[0].keys())
-                    
-                    with open(filename, 'w', newline='', encoding='utf-8') as f:
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        for record in records:
-                            writer.writerow(record)
-                    print(f"Saved to {filename}")
-                else:
-                    print("No records to save.")
-        else:
-            print("Failed to generate records.")
+        print(f"\nGenerating records for {len(pending)} prompt(s)...")
+        results = await generate_records_batch(agent, pending)
+        
+        for prompt, records in zip(pending, results):
+            print(f"\nPrompt: {prompt}")
+            review_records(records, args.fsync, args.full_preview)
+        pending = []
         
         print("\n" + "=" * 50)
+        
+        if quitting:
+            break
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -0,0 +1,37 @@
+import json
+import random
+
+from test_data_generator import RecordStreamParser
+
+RECORDS = [
+    {
+        "id": i,
+        "name": 'Quote " and backslash \\ and braces {[]}' * (i % 3),
+        "tags": ["a", ["nested", "]"]],
+        "meta": {"note": "}", "empty": {}},
+        "ends_with_backslash": "\\",
+    }
+    for i in range(25)
+]
+
+
+def test_records_survive_random_slicing():
+    document = json.dumps({"records": RECORDS, "count": len(RECORDS)})
+    rng = random.Random(0)
+
+    for _ in range(200):
+        parser = RecordStreamParser()
+        record_jsons = []
+        pos = 0
+        while pos < len(document):
+            size = rng.randint(1, 16)
+            record_jsons.extend(parser.feed(document[pos:pos + size]))
+            pos += size
+
+        assert [json.loads(record_json) for record_json in record_jsons] == RECORDS
+
+
+def test_incomplete_record_is_not_returned():
+    parser = RecordStreamParser()
+    assert parser.feed('{"records": [{"id": 1}, {"id": 2') == ['{"id": 1}']
+    assert parser.feed('}], "count": 2}') == ['{"id": 2}']